@@ -1,13 +1,18 @@
 import json
 import os
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
 from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
 from ..models.radio_station import RadioStation
 
 class RadioStationData:
     def __init__(self):
         self.data_file = Path(__file__).parent / "radio_stations.json"
+        # 修改操作可能在线程池中并发执行
+        self._lock = threading.RLock()
         self.stations = self._load_stations_from_file()
+        self._rebuild_indexes()
     
     def _load_stations_from_file(self) -> List[RadioStation]:
         """从 JSON 文件加载电台数据"""
@@ -47,24 +52,85 @@ class RadioStationData:
         ]
         return [RadioStation(**station) for station in default_stations]
     
-    def _save_stations_to_file(self):
-        """将电台数据保存到 JSON 文件"""
+    def _save_stations_to_file(self, compact: bool = False, raise_errors: bool = False):
+        """将电台数据保存到 JSON 文件（compact 用于批量导入的检查点，省去缩进开销）"""
         try:
             with open(self.data_file, 'w', encoding='utf-8') as file:
                 json.dump(
                     [station.dict() for station in self.stations],
                     file,
-                    indent=2,
+                    indent=None if compact else 2,
+                    separators=(',', ':') if compact else None,
                     ensure_ascii=False
                 )
             print(f"Saved {len(self.stations)} radio stations to file")
         except Exception as e:
             print(f"Error saving radio stations to file: {e}")
+            if raise_errors:
+                raise
+    
+    @staticmethod
+    def _url_key(stream_url: Optional[str]) -> str:
+        """规范化流地址，用于去重（只忽略协议和主机的大小写，路径和查询参数区分大小写）"""
+        parts = urlsplit((stream_url or '').strip())
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ''))
+    
+    @staticmethod
+    def _name_city_key(name: Optional[str], city: Optional[str]) -> Tuple[str, str]:
+        """规范化名称 + 城市，用于去重"""
+        return (
+            ' '.join((name or '').split()).casefold(),
+            ' '.join((city or '').split()).casefold(),
+        )
+    
+    def _rebuild_indexes(self):
+        """重建去重索引和下一个 ID"""
+        # 同一个键可能对应多个电台（单个添加/更新不做去重）
+        self._url_index: Dict[str, Set[int]] = {}
+        self._name_city_index: Dict[Tuple[str, str], Set[int]] = {}
+        for station in self.stations:
+            self._index_station(station)
+        self._next_id = max((station.id for station in self.stations), default=0) + 1
+    
+    def _index_station(self, station: RadioStation):
+        """将电台加入去重索引"""
+        url_key = self._url_key(station.stream_url)
+        if url_key:
+            self._url_index.setdefault(url_key, set()).add(station.id)
+        self._name_city_index.setdefault(self._name_city_key(station.name, station.city), set()).add(station.id)
+    
+    def _unindex_station(self, station: RadioStation):
+        """将电台移出去重索引"""
+        for index, key in (
+            (self._url_index, self._url_key(station.stream_url)),
+            (self._name_city_index, self._name_city_key(station.name, station.city)),
+        ):
+            ids = index.get(key)
+            if ids is None:
+                continue
+            ids.discard(station.id)
+            if not ids:
+                del index[key]
+    
+    def find_duplicate(self, station_data: Dict[str, Any]) -> Optional[Tuple[int, str]]:
+        """查找重复电台，返回 (已有电台 ID, 匹配字段)"""
+        url_key = self._url_key(station_data.get('stream_url'))
+        if url_key and url_key in self._url_index:
+            return min(self._url_index[url_key]), 'stream_url'
+        name_city_key = self._name_city_key(station_data.get('name'), station_data.get('city'))
+        if name_city_key in self._name_city_index:
+            return min(self._name_city_index[name_city_key]), 'name+city'
+        return None
     
     def get_all_stations(self) -> List[RadioStation]:
         """获取所有电台"""
         return self.stations
     
+    def iter_stations(self) -> Iterator[RadioStation]:
+        """逐个遍历电台（快照只固定电台列表，导出期间对电台的原地修改仍可能可见）"""
+        # 不加锁：tuple() 复制列表在 GIL 下是原子的，避免在事件循环上等待正在保存的修改
+        return iter(tuple(self.stations))
+    
     def get_station_by_id(self, station_id: int) -> RadioStation:
         """根据 ID 获取电台"""
         for station in self.stations:
@@ -106,15 +172,9 @@ class RadioStationData:
         """获取所有语言"""
         return sorted(list(set(station.language for station in self.stations)))
     
-    def add_station(self, station_data: Dict[str, Any]) -> RadioStation:
-        """添加新电台"""
-        # 生成新 ID
-        if self.stations:
-            new_id = max(station.id for station in self.stations) + 1
-        else:
-            new_id = 1
-            
-        station_data['id'] = new_id
+    def _build_station(self, station_data: Dict[str, Any]) -> RadioStation:
+        """分配 ID 并创建电台（不保存）"""
+        station_data['id'] = self._next_id
         
         # 确保所有字段都有默认值
         station_data.setdefault('description', '')
@@ -126,41 +186,89 @@ class RadioStationData:
         station_data.setdefault('is_ai_generated', False)
         
         new_station = RadioStation(**station_data)
-        self.stations.append(new_station)
+        self._next_id += 1
+        return new_station
+    
+    def add_station(self, station_data: Dict[str, Any]) -> RadioStation:
+        """添加新电台"""
+        with self._lock:
+            new_station = self._build_station(station_data)
+            self.stations.append(new_station)
+            self._index_station(new_station)
         
-        # 保存到文件
-        self._save_stations_to_file()
+            # 保存到文件
+            self._save_stations_to_file()
         
-        return new_station
+            return new_station
+    
+    def add_stations_bulk(self, stations_data: List[Dict[str, Any]], save: bool = True) -> Tuple[List[RadioStation], List[Tuple[int, str]]]:
+        """批量添加电台，整批只保存一次文件
+        
+        返回 (新增电台, [(批内序号, 跳过原因)])，重复电台（包括同批内重复）会被跳过。
+        save=False 时只更新内存，由调用方通过 save_stations 统一保存。
+        """
+        with self._lock:
+            added = []
+            skipped = []
+            for position, station_data in enumerate(stations_data):
+                duplicate = self.find_duplicate(station_data)
+                if duplicate:
+                    existing_id, field = duplicate
+                    skipped.append((position, f"Duplicate of station {existing_id} ({field})"))
+                    continue
+                try:
+                    new_station = self._build_station(dict(station_data))
+                except Exception as e:
+                    skipped.append((position, str(e)))
+                    continue
+                self.stations.append(new_station)
+                self._index_station(new_station)
+                added.append(new_station)
+        
+            # 整批保存一次
+            if added and save:
+                self._save_stations_to_file()
+        
+            return added, skipped
+    
+    def save_stations(self, compact: bool = False):
+        """保存当前所有电台，失败时抛出异常"""
+        with self._lock:
+            self._save_stations_to_file(compact=compact, raise_errors=True)
     
     def update_station(self, station_id: int, station_data: Dict[str, Any]) -> RadioStation:
         """更新电台"""
-        station = self.get_station_by_id(station_id)
-        if not station:
-            return None
+        with self._lock:
+            station = self.get_station_by_id(station_id)
+            if not station:
+                return None
         
-        # 更新字段
-        for key, value in station_data.items():
-            if hasattr(station, key) and key != 'id':  # 不能修改 ID
-                setattr(station, key, value)
+            # 更新字段
+            self._unindex_station(station)
+            for key, value in station_data.items():
+                if hasattr(station, key) and key != 'id':  # 不能修改 ID
+                    setattr(station, key, value)
+            self._index_station(station)
         
-        # 保存到文件
-        self._save_stations_to_file()
+            # 保存到文件
+            self._save_stations_to_file()
         
-        return station
+            return station
     
     def delete_station(self, station_id: int) -> bool:
         """删除电台"""
-        station = self.get_station_by_id(station_id)
-        if not station:
-            return False
+        with self._lock:
+            station = self.get_station_by_id(station_id)
+            if not station:
+                return False
         
-        self.stations.remove(station)
+            self.stations.remove(station)
+            self._unindex_station(station)
         
-        # 保存到文件
-        self._save_stations_to_file()
+            # 保存到文件
+            self._save_stations_to_file()
         
-        return True
+            return True
 
 # 创建全局实例
 radio_station_data = RadioStationData()
\ No newline at end of file
@@ -1,12 +1,14 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing import List, Optional, AsyncGenerator
 import os
 from dotenv import load_dotenv
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from contextlib import asynccontextmanager
 import asyncio
 import json
+import time
 
 # Load environment variables
 load_dotenv()
@@ -14,8 +16,21 @@ load_dotenv()
 from .models.radio_station import RadioStation
 from .services.radio_service import RadioService
 from .services.ai_service import AIService
+from .services import station_io
+from .services.performance import CatalogExecutor, EventLoopLagMonitor, InFlightRouteMiddleware
 
-app = FastAPI(title="MRGA API", description="Make Radio Great Again API")
+# Blocking catalog work runs in a bounded thread pool so the event loop stays free for SSE streams
+catalog_executor = CatalogExecutor()
+loop_monitor = EventLoopLagMonitor()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    catalog_executor.shutdown()
+
+app = FastAPI(title="MRGA API", description="Make Radio Great Again API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -30,6 +45,15 @@ app.add_middleware(
 radio_service = RadioService()
 ai_service = AIService()
 
+# Tracks routes until their body (including SSE streams) has finished, for stall attribution
+app.add_middleware(InFlightRouteMiddleware, monitor=loop_monitor)
+
+# Bulk import/export limits
+MAX_IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_IMPORT_ERRORS = 1000
+# Batches are applied in memory; the catalog file is rewritten at most this often during an import
+IMPORT_CHECKPOINT_SECONDS = 10
+
 # Request/Response models
 class AIChatRequest(BaseModel):
     prompt: str
@@ -71,15 +95,33 @@ class UpdateStationRequest(BaseModel):
 async def root():
     return {"message": "Welcome to MRGA API - Make Radio Great Again!"}
 
+station_list_adapter = TypeAdapter(List[RadioStation])
+
+def dump_all_stations() -> bytes:
+    """Serialize the full catalog to JSON (CPU-bound for large catalogs)"""
+    return station_list_adapter.dump_json(radio_service.get_all_stations())
+
 @app.get("/api/radio-stations", response_model=List[RadioStation])
 async def get_radio_stations():
     """Get all radio stations"""
-    return radio_service.get_all_stations()
+    content = await catalog_executor.run("dump_all_stations", dump_all_stations)
+    return Response(content=content, media_type="application/json")
+
+@app.get("/api/radio-stations/export")
+async def export_radio_stations(fmt: str = Query("ndjson", alias="format")):
+    """Stream all radio stations as NDJSON or CSV"""
+    if fmt not in station_io.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported export format")
+    return StreamingResponse(
+        station_io.export_stations(radio_service.iter_stations(), fmt),
+        media_type=station_io.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="radio_stations.{fmt}"'},
+    )
 
 @app.get("/api/radio-stations/{station_id}", response_model=RadioStation)
 async def get_radio_station(station_id: int):
     """Get radio station by ID"""
-    station = radio_service.get_station_by_id(station_id)
+    station = await catalog_executor.run("get_station_by_id", radio_service.get_station_by_id, station_id)
     if not station:
         raise HTTPException(status_code=404, detail="Station not found")
     return station
@@ -87,27 +129,111 @@ async def get_radio_station(station_id: int):
 @app.get("/api/genres")
 async def get_genres():
     """Get all music genres"""
-    return radio_service.get_genres()
+    return await catalog_executor.run("get_genres", radio_service.get_genres)
 
 @app.get("/api/countries")
 async def get_countries():
     """Get all countries"""
-    return radio_service.get_countries()
+    return await catalog_executor.run("get_countries", radio_service.get_countries)
 
 @app.get("/api/languages")
 async def get_languages():
     """Get all languages"""
-    return radio_service.get_languages()
+    return await catalog_executor.run("get_languages", radio_service.get_languages)
 
 @app.post("/api/radio-stations", response_model=RadioStation)
 async def create_station(station_data: CreateStationRequest):
     """Create new radio station"""
     try:
-        new_station = radio_service.add_station(station_data.dict())
+        new_station = await catalog_executor.run("add_station", radio_service.add_station, station_data.dict())
         return new_station
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating station: {str(e)}")
 
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+@app.post("/api/radio-stations/import")
+async def import_radio_stations(
+    request: Request,
+    fmt: str = Query("ndjson", alias="format"),
+    batch_size: int = Query(1000, ge=1, le=MAX_IMPORT_BATCH_SIZE),
+):
+    """Bulk import radio stations from an NDJSON or CSV request body"""
+    if fmt not in station_io.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported import format")
+
+    report = {"received": 0, "imported": 0, "skipped": 0, "errors": [], "aborted": None}
+    last_row = 0
+    last_checkpoint = time.monotonic()
+
+    def trim_errors():
+        # Batch errors arrive after parse errors for later rows, so keep the earliest rows
+        report["errors"].sort(key=lambda error: error["row"])
+        del report["errors"][MAX_REPORTED_IMPORT_ERRORS:]
+
+    def record_error(row_number: int, message: str):
+        report["skipped"] += 1
+        report["errors"].append({"row": row_number, "error": message})
+        if len(report["errors"]) >= 2 * MAX_REPORTED_IMPORT_ERRORS:
+            trim_errors()
+
+    async def apply_batch(batch: list, batch_rows: list):
+        nonlocal last_checkpoint
+        added, skipped = await catalog_executor.run(
+            "add_stations_bulk", radio_service.add_stations_bulk, batch, False
+        )
+        report["imported"] += len(added)
+        for position, message in skipped:
+            record_error(batch_rows[position], message)
+        # Rewriting the whole file per batch makes large imports quadratic, so checkpoint on a timer
+        if added and time.monotonic() - last_checkpoint >= IMPORT_CHECKPOINT_SECONDS:
+            await catalog_executor.run("save_stations", radio_service.save_stations, True)
+            last_checkpoint = time.monotonic()
+
+    batch, batch_rows = [], []
+    try:
+        async for row_number, row, error in station_io.iter_rows(fmt, request.stream()):
+            last_row = row_number
+            report["received"] += 1
+            if error:
+                record_error(row_number, error)
+                continue
+            try:
+                station = CreateStationRequest(**row)
+            except ValidationError as e:
+                record_error(row_number, _format_validation_error(e))
+                continue
+            batch.append(station.dict())
+            batch_rows.append(row_number)
+            if len(batch) >= batch_size:
+                full_batch, full_batch_rows = batch, batch_rows
+                batch, batch_rows = [], []
+                await apply_batch(full_batch, full_batch_rows)
+    except Exception as e:
+        # Keep the rows applied so far and tell the client where the stream broke off
+        report["aborted"] = f"Import stopped after row {last_row}: {type(e).__name__}: {e}"
+        print(f"ERROR: {report['aborted']}")
+
+    try:
+        if batch:
+            await apply_batch(batch, batch_rows)
+    except Exception as e:
+        report["aborted"] = report["aborted"] or f"Error applying final batch: {e}"
+    finally:
+        if report["imported"]:
+            try:
+                await catalog_executor.run("save_stations", radio_service.save_stations)
+            except Exception as e:
+                failure = f"Failed to save imported stations: {e}"
+                report["aborted"] = f"{report['aborted']}; {failure}" if report["aborted"] else failure
+
+    trim_errors()
+    report["errors_truncated"] = report["skipped"] > len(report["errors"])
+    return report
+
 @app.put("/api/radio-stations/{station_id}", response_model=RadioStation)
 async def update_station(station_id: int, station_data: UpdateStationRequest):
     """Update radio station"""
@@ -115,7 +241,9 @@ async def update_station(station_id: int, station_data: UpdateStationRequest):
         # Remove fields that are not provided
         update_data = {k: v for k, v in station_data.dict().items() if v is not None}
         
-        updated_station = radio_service.update_station(station_id, update_data)
+        updated_station = await catalog_executor.run(
+            "update_station", radio_service.update_station, station_id, update_data
+        )
         if not updated_station:
             raise HTTPException(status_code=404, detail="Station not found")
         return updated_station
@@ -128,7 +256,7 @@ async def update_station(station_id: int, station_data: UpdateStationRequest):
 async def delete_station(station_id: int):
     """Delete radio station"""
     try:
-        success = radio_service.delete_station(station_id)
+        success = await catalog_executor.run("delete_station", radio_service.delete_station, station_id)
         if not success:
             raise HTTPException(status_code=404, detail="Station not found")
         return {"message": "Station deleted successfully"}
@@ -137,23 +265,20 @@ async def delete_station(station_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting station: {str(e)}")
 
-@app.post("/api/ai/chat")
-async def ai_chat(request: AIChatRequest):
-    """AI chat to recommend radio stations"""
-    try:
-        # Build complete prompt with station information
-        stations = radio_service.get_all_stations()
-        stations_context = "\n".join([
-            f"{s.name} - {s.genre} from {s.city}, {s.country} ({s.language}) - {s.description or ''} {s.tags and f'[Tags: {', '.join(s.tags)}]' or ''}"
-            for s in stations
-        ])
+def build_recommendation_prompt(user_prompt: str) -> str:
+    """Build the DJ prompt listing every station (CPU-bound for large catalogs)"""
+    stations = radio_service.get_all_stations()
+    stations_context = "\n".join([
+        f"{s.name} - {s.genre} from {s.city}, {s.country} ({s.language}) - {s.description or ''} {s.tags and f'[Tags: {', '.join(s.tags)}]' or ''}"
+        for s in stations
+    ])
 
-        full_prompt = f"""You are a friendly radio DJ helping people discover radio stations.
+    return f"""You are a friendly radio DJ helping people discover radio stations.
 
 Here are all available stations:
 {stations_context}
 
-User request: "{request.prompt}"
+User request: "{user_prompt}"
 
 Based on the user's request, recommend 3-5 relevant stations from the list above. Be conversational, fun, and explain why each station matches their request. Format your response naturally as if chatting with a friend.
 
@@ -164,6 +289,13 @@ Example format:
 
 RECOMMENDED_STATIONS: BBC Radio 1, KEXP 90.3 FM, Radio Paradise\""""
 
+@app.post("/api/ai/chat")
+async def ai_chat(request: AIChatRequest):
+    """AI chat to recommend radio stations"""
+    try:
+        # Build complete prompt with station information
+        full_prompt = await catalog_executor.run("build_prompt", build_recommendation_prompt, request.prompt)
+
         # Call appropriate AI service based on selected provider
         if request.provider == "openai":
             response = await ai_service.call_openai(full_prompt)
@@ -186,27 +318,7 @@ async def ai_chat_stream(request: AIChatRequest):
         print(f"Received AI chat stream request: provider={request.provider}, prompt_length={len(request.prompt)}")
         
         # Build complete prompt with station information
-        stations = radio_service.get_all_stations()
-        stations_context = "\n".join([
-            f"{s.name} - {s.genre} from {s.city}, {s.country} ({s.language}) - {s.description or ''} {s.tags and f'[Tags: {', '.join(s.tags)}]' or ''}"
-            for s in stations
-        ])
-
-        full_prompt = f"""You are a friendly radio DJ helping people discover radio stations.
-
-Here are all available stations:
-{stations_context}
-
-User request: "{request.prompt}"
-
-Based on the user's request, recommend 3-5 relevant stations from the list above. Be conversational, fun, and explain why each station matches their request. Format your response naturally as if chatting with a friend.
-
-Then, at the end of your message, add a line "RECOMMENDED_STATIONS:" followed by the exact station names you recommended (exactly matching the names in the list).
-
-Example format:
-"Your message here...
-
-RECOMMENDED_STATIONS: BBC Radio 1, KEXP 90.3 FM, Radio Paradise\""""
+        full_prompt = await catalog_executor.run("build_prompt", build_recommendation_prompt, request.prompt)
 
         print(f"Full prompt length: {len(full_prompt)}")
 
@@ -251,6 +363,15 @@ async def health_check():
     stations = radio_service.get_all_stations()
     return {"status": "healthy", "stations_count": len(stations)}
 
+@app.get("/api/health/performance")
+async def performance_report():
+    """Catalog operation timings and recent event loop stalls"""
+    return {
+        "catalog_workers": catalog_executor.max_workers,
+        "catalog_operations": catalog_executor.stats(),
+        "event_loop": loop_monitor.report(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,210 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+
+class CatalogExecutor:
+    """Bounded thread pool for blocking catalog work, with per-operation timing"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("CATALOG_WORKERS", "4"))
+        self.slow_threshold = float(os.getenv("CATALOG_SLOW_OP_MS", "200")) / 1000
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="catalog")
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, operation: str, wait: float, elapsed: float):
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                operation, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "total_wait_ms": 0.0}
+            )
+            stats["count"] += 1
+            stats["total_ms"] += elapsed * 1000
+            stats["max_ms"] = max(stats["max_ms"], elapsed * 1000)
+            stats["total_wait_ms"] += wait * 1000
+        if elapsed >= self.slow_threshold:
+            print(f"Slow catalog operation: {operation} took {elapsed * 1000:.1f}ms")
+
+    async def run(self, operation: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `func` in the pool without blocking the event loop"""
+        submitted = time.perf_counter()
+
+        def timed_call():
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._record(operation, started - submitted, time.perf_counter() - started)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, timed_call)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._stats_lock:
+            return {
+                operation: {
+                    "count": stats["count"],
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "avg_wait_ms": round(stats["total_wait_ms"] / stats["count"], 3),
+                }
+                for operation, stats in self._stats.items()
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+# ASGI scope of the request whose task is running; copied into child tasks such as streaming bodies
+current_request: ContextVar[Optional[dict]] = ContextVar("current_request", default=None)
+
+
+def route_name(scope: dict) -> str:
+    """Name a request by its matched route template once routing has run, else by raw path"""
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', None) or scope['path']}"
+
+
+class EventLoopLagMonitor:
+    """Detects event loop stalls and attributes them to the route whose task was running
+
+    A heartbeat task measures lag. While the loop is blocked the heartbeat can't run, so a
+    watchdog thread samples the loop's current task and reads its request from `current_request`.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: Optional[float] = None, history: int = 100):
+        self.interval = interval
+        self.threshold = (
+            threshold if threshold is not None
+            else float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100")) / 1000
+        )
+        self.stalls = deque(maxlen=history)
+        self.max_lag_ms = 0.0
+        # In-flight requests by scope id; streaming ones have started sending a multi-part body
+        self._active: Dict[int, dict] = {}
+        self._streaming: Set[int] = set()
+        # Requests that finished since the last tick; a stall is only measured after it ends
+        self._finished_routes: Set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._beat = 0
+        self._beat_at = time.perf_counter()
+        self._offender: Optional[Tuple[int, Optional[str]]] = None
+
+    def request_started(self, scope: dict):
+        self._active[id(scope)] = scope
+
+    def request_streaming(self, scope: dict):
+        self._streaming.add(id(scope))
+
+    def request_finished(self, scope: dict):
+        self._active.pop(id(scope), None)
+        self._streaming.discard(id(scope))
+        self._finished_routes.add(route_name(scope))
+
+    def _sample_offender(self) -> Optional[str]:
+        """Called from the watchdog thread while the loop is blocked"""
+        task = asyncio.current_task(self._loop)
+        get_context = getattr(task, "get_context", None)
+        if get_context is None:
+            return None
+        scope = get_context().get(current_request)
+        return route_name(scope) if scope is not None else None
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            if time.perf_counter() - self._beat_at < self.threshold:
+                continue
+            if self._offender is None or self._offender[0] != beat:
+                try:
+                    self._offender = (beat, self._sample_offender())
+                except Exception:
+                    self._offender = (beat, None)
+
+    async def _run(self):
+        while True:
+            self._finished_routes.clear()
+            self._beat += 1
+            beat = self._beat
+            self._beat_at = time.perf_counter()
+            expected = self._beat_at + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - expected
+            self.max_lag_ms = max(self.max_lag_ms, lag * 1000)
+            if lag >= self.threshold:
+                offender = self._offender[1] if self._offender and self._offender[0] == beat else None
+                streams = sorted({route_name(self._active[key]) for key in self._streaming if key in self._active})
+                requests = sorted(
+                    {route_name(scope) for key, scope in self._active.items() if key not in self._streaming}
+                    | (self._finished_routes - set(streams))
+                )
+                self.stalls.append({
+                    "at": time.time(),
+                    "lag_ms": round(lag * 1000, 1),
+                    "route": offender,
+                    "in_flight_requests": requests,
+                    "in_flight_streams": streams,
+                })
+                print(
+                    f"Event loop stalled for {lag * 1000:.1f}ms (route: {offender or 'unknown'}; "
+                    f"in-flight: {', '.join(requests) or 'none'}; streams: {', '.join(streams) or 'none'})"
+                )
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._stopped.clear()
+            self._task = self._loop.create_task(self._run())
+            self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "recent_stalls": list(self.stalls),
+        }
+
+
+class InFlightRouteMiddleware:
+    """ASGI middleware that tags each request for stall attribution until its body has been sent"""
+
+    def __init__(self, app, monitor: EventLoopLagMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def tracking_send(message):
+            if message["type"] == "http.response.body" and message.get("more_body", False):
+                self.monitor.request_streaming(scope)
+            await send(message)
+
+        token = current_request.set(scope)
+        self.monitor.request_started(scope)
+        try:
+            await self.app(scope, receive, tracking_send)
+        finally:
+            self.monitor.request_finished(scope)
+            current_request.reset(token)
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from ..data.radio_stations import radio_station_data
 from ..models.radio_station import RadioStation
 
@@ -10,6 +10,10 @@ class RadioService:
         """获取所有电台"""
         return self.data.get_all_stations()
     
+    def iter_stations(self) -> Iterator[RadioStation]:
+        """逐个遍历电台"""
+        return self.data.iter_stations()
+    
     def get_station_by_id(self, station_id: int) -> Optional[RadioStation]:
         """根据 ID 获取电台"""
         return self.data.get_station_by_id(station_id)
@@ -34,6 +38,14 @@ class RadioService:
         """添加新电台"""
         return self.data.add_station(station_data)
     
+    def add_stations_bulk(self, stations_data: List[dict], save: bool = True) -> Tuple[List[RadioStation], List[Tuple[int, str]]]:
+        """批量添加电台"""
+        return self.data.add_stations_bulk(stations_data, save)
+    
+    def save_stations(self, compact: bool = False):
+        """保存所有电台到文件"""
+        self.data.save_stations(compact)
+    
     def update_station(self, station_id: int, station_data: dict) -> RadioStation:
         """更新电台"""
         return self.data.update_station(station_id, station_data)
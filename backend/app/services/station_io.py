@@ -0,0 +1,169 @@
+import codecs
+import csv
+import io
+import json
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Iterable, Iterator, Optional, Tuple
+
+from ..models.radio_station import RadioStation
+
+# Supported bulk formats and their media types
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+STATION_FIELDS = list(RadioStation.model_fields)
+TAG_SEPARATOR = ";"
+
+# Longest accepted line (and multi-line CSV record), in characters
+MAX_LINE_LENGTH = 64 * 1024
+LINE_TOO_LONG = f"Line too long (over {MAX_LINE_LENGTH} characters)"
+
+# (line number, parsed row or None, error message or None)
+ParsedRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncGenerator[Tuple[int, Optional[str]], None]:
+    """Decode a byte stream incrementally and yield (line number, line) pairs
+
+    Lines longer than MAX_LINE_LENGTH are dropped while streaming and yielded as None.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    parts = []
+    length = 0
+    line_number = 0
+
+    def finish_line(tail: str) -> Optional[str]:
+        nonlocal parts, length
+        line = None if length + len(tail) > MAX_LINE_LENGTH else "".join(parts) + tail
+        parts, length = [], 0
+        return line.rstrip("\r") if line is not None else None
+
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        start = 0
+        # Only scan the new data for line breaks
+        while (end := text.find("\n", start)) != -1:
+            line_number += 1
+            yield line_number, finish_line(text[start:end])
+            start = end + 1
+        tail = text[start:]
+        length += len(tail)
+        if length <= MAX_LINE_LENGTH:
+            parts.append(tail)
+        else:
+            parts = []
+    tail = decoder.decode(b"", final=True)
+    if length or tail:
+        yield line_number + 1, finish_line(tail)
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncGenerator[ParsedRow, None]:
+    """Parse one JSON object per line, skipping blank lines"""
+    async for line_number, line in iter_lines(chunks):
+        if line is None:
+            yield line_number, None, LINE_TOO_LONG
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, row, None
+
+
+def _csv_record_to_row(header: list, record: list) -> Dict[str, Any]:
+    """Map a CSV record onto station fields; empty cells fall back to defaults"""
+    row = {}
+    for key, value in zip(header, record):
+        if key not in STATION_FIELDS or value == "":
+            continue
+        if key == "tags":
+            row[key] = [tag.strip() for tag in value.split(TAG_SEPARATOR) if tag.strip()]
+        else:
+            row[key] = value
+    return row
+
+
+def _parse_csv_record(lines: list) -> Optional[list]:
+    """Parse buffered lines as one CSV record; None while a quoted field is still open"""
+    text = "\n".join(lines)
+    try:
+        next(csv.reader(io.StringIO(text), strict=True))
+    except csv.Error as e:
+        # Strict mode is only used to find record boundaries; other quirks are parsed leniently
+        if str(e) == "unexpected end of data":
+            return None
+    return next(csv.reader(io.StringIO(text)))
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncGenerator[ParsedRow, None]:
+    """Parse CSV with a header row; quoted fields may span several lines"""
+    header = None
+    pending = []
+    pending_length = 0
+    start_line = 0
+    async for line_number, line in iter_lines(chunks):
+        if not pending:
+            start_line = line_number
+            if line is not None and not line.strip():
+                continue
+        # An unclosed quote can't swallow the rest of the file: records share the line length cap
+        if line is None or pending_length + len(line) > MAX_LINE_LENGTH:
+            pending, pending_length = [], 0
+            yield start_line, None, LINE_TOO_LONG
+            continue
+        pending.append(line)
+        pending_length += len(line) + 1
+        record = _parse_csv_record(pending)
+        if record is None:
+            continue
+        pending, pending_length = [], 0
+        if header is None:
+            header = [column.strip() for column in record]
+            continue
+        if len(record) != len(header):
+            yield start_line, None, f"Expected {len(header)} columns, got {len(record)}"
+            continue
+        yield start_line, _csv_record_to_row(header, record), None
+    if pending:
+        yield start_line, None, "Unterminated quoted field"
+
+
+def iter_rows(fmt: str, chunks: AsyncIterator[bytes]) -> AsyncGenerator[ParsedRow, None]:
+    """Pick the row parser for a bulk format"""
+    if fmt == "csv":
+        return iter_csv_rows(chunks)
+    return iter_ndjson_rows(chunks)
+
+
+def _station_to_csv(station: RadioStation) -> str:
+    buffer = io.StringIO()
+    values = station.dict()
+    values["tags"] = TAG_SEPARATOR.join(values.get("tags") or [])
+    csv.writer(buffer, lineterminator="\n").writerow(
+        "" if values[field] is None else values[field] for field in STATION_FIELDS
+    )
+    return buffer.getvalue()
+
+
+def export_stations(stations: Iterable[RadioStation], fmt: str, chunk_size: int = 500) -> Iterator[str]:
+    """Serialize stations lazily, yielding a chunk every `chunk_size` rows"""
+    chunk = []
+    if fmt == "csv":
+        chunk.append(",".join(STATION_FIELDS) + "\n")
+    for station in stations:
+        if fmt == "csv":
+            chunk.append(_station_to_csv(station))
+        else:
+            chunk.append(json.dumps(station.dict(), ensure_ascii=False) + "\n")
+        if len(chunk) >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)